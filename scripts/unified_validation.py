@@ -51,6 +51,46 @@ try:
 except ImportError:
     TF_AVAILABLE = False
 
+try:
+    import pyarrow as pa
+    from pyarrow import csv as pa_csv
+    PYARROW_AVAILABLE = True
+except ImportError:
+    PYARROW_AVAILABLE = False
+
+# Known column types for the transaction datasets; skips per-column type inference.
+# Numeric columns stay 64-bit so IQR bounds and rule ranges match pandas parsing.
+TRANSACTION_COLUMN_TYPES = {
+    'id': 'int64',
+    'transaction_amount': 'float64',
+    'account_balance': 'float64',
+    'risk_score': 'float64',
+    'account_age': 'int64',
+    'account_type': 'category',
+    'region': 'category',
+} if PYARROW_AVAILABLE else {}
+
+
+def read_csv_fast(filepath: str) -> pd.DataFrame:
+    """Read a CSV with PyArrow's multi-threaded parser, falling back to pandas."""
+    if not PYARROW_AVAILABLE:
+        return pd.read_csv(filepath)
+    arrow_types = {
+        'int64': pa.int64(),
+        'float64': pa.float64(),
+        'category': pa.dictionary(pa.int32(), pa.string()),
+    }
+    convert_options = pa_csv.ConvertOptions(
+        column_types={col: arrow_types[t] for col, t in TRANSACTION_COLUMN_TYPES.items()},
+        strings_can_be_null=True,  # empty fields become NaN, as with pd.read_csv
+    )
+    try:
+        table = pa_csv.read_csv(filepath, convert_options=convert_options)
+    except pa.ArrowInvalid:
+        # Columns that don't fit the known schema: let pandas infer types
+        return pd.read_csv(filepath)
+    return table.to_pandas(self_destruct=True)
+
 # ============================================================================
 # FUTURE: Git Secrets support (commented out for now)
 # ============================================================================
@@ -80,6 +120,18 @@ RESET = '\033[0m'
 BOLD = '\033[1m'
 
 
+def overlap_matrix(masks: dict) -> pd.DataFrame:
+    """Pairwise intersection counts of boolean masks (diagonal = per-method totals).
+
+    Stacks the masks into one (n_rows, k) matrix and computes M.T @ M in a single
+    BLAS call instead of k*k separate `(a & b).sum()` passes.
+    """
+    names = list(masks)
+    M = np.column_stack([masks[name] for name in names]).astype(np.float64)
+    counts = (M.T @ M).round().astype(np.int64)
+    return pd.DataFrame(counts, index=names, columns=names)
+
+
 class UnifiedValidator:
     """Unified anomaly detection validator combining all techniques"""
 
@@ -89,6 +141,9 @@ class UnifiedValidator:
         self.data_source = None
         self.df = None
         self.numeric_cols = None
+        self.masks = {}
+        self.features = None
+        self.ml_features = None
 
     def load_data(self) -> bool:
         """Load data from CSV or database"""
@@ -111,7 +166,7 @@ class UnifiedValidator:
                 print(f"{RED}✗ CSV file not found: {filepath}{RESET}")
                 return False
 
-            self.df = pd.read_csv(filepath)
+            self.df = read_csv_fast(filepath)
             self.data_source = f"CSV: {filepath}"
             print(f"✓ Loaded CSV: {filepath}")
             print(f"  Records: {len(self.df)}")
@@ -164,6 +219,12 @@ class UnifiedValidator:
         self.numeric_cols = self.numeric_cols[:min(4, len(self.numeric_cols))]
         print(f"✓ Numeric columns identified: {self.numeric_cols}")
         print(f"✓ Using {len(self.numeric_cols)} columns for validation")
+
+        # Materialize the feature matrix once and share it across the IQR/ML detectors:
+        # float64 for IQR bounds, contiguous float32 for the ML models
+        X = self.df[self.numeric_cols].to_numpy(dtype=np.float64)
+        self.features = (X, self.df.index)
+        self.ml_features = (np.ascontiguousarray(X, dtype=np.float32), self.df.index)
         return True
 
     def run_all_validations(self):
@@ -204,6 +265,7 @@ class UnifiedValidator:
 
             print(f"✓ {BLUE}Rule-Based:{RESET} {anomalies} anomalies ({anomalies/len(self.df)*100:.2f}%) | {elapsed:.4f}s")
             self.results["RULE_BASED"] = {"anomalies": anomalies, "time": elapsed}
+            self.masks["RULE_BASED"] = result['anomaly'].to_numpy(dtype=bool)
         except Exception as e:
             print(f"{YELLOW}⚠ Rule-Based: {str(e)[:50]}{RESET}")
 
@@ -211,34 +273,37 @@ class UnifiedValidator:
         """IQR statistical baseline"""
         start = time.time()
         detector = AnomalyDetector(factor=1.5)
-        mask = detector.detect(self.df, columns=self.numeric_cols)
+        mask = detector.detect(self.features, columns=self.numeric_cols)
         elapsed = time.time() - start
         count = mask.sum()
 
         print(f"✓ {BLUE}IQR Baseline:{RESET} {count} anomalies ({count/len(self.df)*100:.2f}%) | {elapsed:.4f}s")
         self.results["IQR"] = {"anomalies": count, "time": elapsed}
+        self.masks["IQR"] = np.asarray(mask, dtype=bool)
 
     def validate_isolation_forest(self):
         """Isolation Forest ML"""
         start = time.time()
         detector = AnomalyDetector(method='isolation_forest', ml_params={'contamination': 0.05})
-        mask = detector.detect(self.df, columns=self.numeric_cols)
+        mask = detector.detect(self.ml_features, columns=self.numeric_cols)
         elapsed = time.time() - start
         count = mask.sum()
 
         print(f"✓ {BLUE}Isolation Forest:{RESET} {count} anomalies ({count/len(self.df)*100:.2f}%) | {elapsed:.4f}s")
         self.results["ISOLATION_FOREST"] = {"anomalies": count, "time": elapsed}
+        self.masks["ISOLATION_FOREST"] = np.asarray(mask, dtype=bool)
 
     def validate_kmeans(self):
         """K-Means Clustering ML"""
         start = time.time()
         detector = AnomalyDetector(method='clustering', ml_params={'contamination': 0.05})
-        mask = detector.detect(self.df, columns=self.numeric_cols)
+        mask = detector.detect(self.ml_features, columns=self.numeric_cols)
         elapsed = time.time() - start
         count = mask.sum()
 
         print(f"✓ {BLUE}K-Means Clustering:{RESET} {count} anomalies ({count/len(self.df)*100:.2f}%) | {elapsed:.4f}s")
         self.results["KMEANS"] = {"anomalies": count, "time": elapsed}
+        self.masks["KMEANS"] = np.asarray(mask, dtype=bool)
 
     def validate_autoencoder(self):
         """Autoencoder Deep Learning"""
@@ -248,12 +313,13 @@ class UnifiedValidator:
 
         start = time.time()
         detector = AnomalyDetector(method='autoencoder', ml_params={'contamination': 0.05})
-        mask = detector.detect(self.df, columns=self.numeric_cols)
+        mask = detector.detect(self.ml_features, columns=self.numeric_cols)
         elapsed = time.time() - start
         count = mask.sum()
 
         print(f"✓ {BLUE}Autoencoder:{RESET} {count} anomalies ({count/len(self.df)*100:.2f}%) | {elapsed:.4f}s")
         self.results["AUTOENCODER"] = {"anomalies": count, "time": elapsed}
+        self.masks["AUTOENCODER"] = np.asarray(mask, dtype=bool)
 
     def validate_fuzzy_logic(self):
         """Fuzzy Logic AI"""
@@ -266,6 +332,7 @@ class UnifiedValidator:
 
         print(f"✓ {BLUE}Fuzzy Logic:{RESET} {count} anomalies ({count/len(self.df)*100:.2f}%) | {elapsed:.4f}s")
         self.results["FUZZY_LOGIC"] = {"anomalies": count, "time": elapsed}
+        self.masks["FUZZY_LOGIC"] = np.asarray(mask, dtype=bool)
 
     def validate_expert_system(self):
         """Expert System AI"""
@@ -278,6 +345,7 @@ class UnifiedValidator:
 
         print(f"✓ {BLUE}Expert System:{RESET} {count} anomalies ({count/len(self.df)*100:.2f}%) | {elapsed:.4f}s")
         self.results["EXPERT_SYSTEM"] = {"anomalies": count, "time": elapsed}
+        self.masks["EXPERT_SYSTEM"] = np.asarray(mask, dtype=bool)
 
     def validate_time_series(self):
         """Time Series Forecasting AI"""
@@ -290,6 +358,7 @@ class UnifiedValidator:
 
         print(f"✓ {BLUE}Time Series:{RESET} {count} anomalies ({count/len(self.df)*100:.2f}%) | {elapsed:.4f}s")
         self.results["TIME_SERIES"] = {"anomalies": count, "time": elapsed}
+        self.masks["TIME_SERIES"] = np.asarray(mask, dtype=bool)
 
     def validate_genetic_algorithm(self):
         """Genetic Algorithm AI"""
@@ -302,6 +371,7 @@ class UnifiedValidator:
 
         print(f"✓ {BLUE}Genetic Algorithm:{RESET} {count} anomalies ({count/len(self.df)*100:.2f}%) | {elapsed:.4f}s")
         self.results["GENETIC_ALGORITHM"] = {"anomalies": count, "time": elapsed}
+        self.masks["GENETIC_ALGORITHM"] = np.asarray(mask, dtype=bool)
 
     def validate_ensemble_ai(self):
         """Ensemble AI (all techniques combined)"""
@@ -314,6 +384,7 @@ class UnifiedValidator:
 
         print(f"✓ {BLUE}Ensemble AI:{RESET} {count} anomalies ({count/len(self.df)*100:.2f}%) | {elapsed:.4f}s")
         self.results["ENSEMBLE_AI"] = {"anomalies": count, "time": elapsed}
+        self.masks["ENSEMBLE_AI"] = np.asarray(mask, dtype=bool)
 
     def validate_neural_symbolic(self):
         """Neural-Symbolic AI"""
@@ -330,6 +401,7 @@ class UnifiedValidator:
 
         print(f"✓ {BLUE}Neural-Symbolic:{RESET} {count} anomalies ({count/len(self.df)*100:.2f}%) | {elapsed:.4f}s")
         self.results["NEURAL_SYMBOLIC"] = {"anomalies": count, "time": elapsed}
+        self.masks["NEURAL_SYMBOLIC"] = np.asarray(mask, dtype=bool)
 
     def print_comparison(self):
         """Print comparison table"""
@@ -359,6 +431,11 @@ class UnifiedValidator:
                     pct = f"{anomalies/len(self.df)*100:.2f}%" if len(self.df) > 0 else "N/A"
                     print(f"  {method:<25} {anomalies:>6} anomalies ({pct:>6}) | {time_taken:>7.4f}s")
 
+        if self.args.compare and len(self.masks) > 1:
+            print(f"\n{BOLD}● Overlap (rows flagged by both methods){RESET}")
+            print("-" * 100)
+            print(overlap_matrix(self.masks).to_string())
+
     def print_statistics(self):
         """Print summary statistics"""
         if not self.results:
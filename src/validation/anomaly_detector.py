@@ -1,4 +1,6 @@
 # src/validation/anomaly_detector.py
+import hashlib
+import weakref
 import pandas as pd
 import numpy as np
 from .ml_anomaly import MLAnomaly
@@ -11,6 +13,68 @@ from .ai_techniques import (
     NeuralSymbolicDetector
 )
 
+try:
+    from numba import njit, prange
+    NUMBA_AVAILABLE = True
+except Exception:
+    NUMBA_AVAILABLE = False
+
+
+def _quartiles(arr):
+    """Q1 and Q3 of each column of a 2-D float array, ignoring NaNs.
+
+    Uses np.partition (O(n) introselect) with numpy's default linear
+    interpolation instead of a full sort per quantile.
+    """
+    n_rows, n_cols = arr.shape
+    nan_mask = np.isnan(arr)
+    if not nan_mask.any():
+        return _partition_quartiles(arr, n_rows)
+    q1 = np.full(n_cols, np.nan)
+    q3 = np.full(n_cols, np.nan)
+    for j in range(n_cols):
+        col = arr[~nan_mask[:, j], j]
+        if col.size:
+            q1[j], q3[j] = _partition_quartiles(col, col.size)
+    return q1, q3
+
+
+def _partition_quartiles(arr, n):
+    k1 = 0.25 * (n - 1)
+    k3 = 0.75 * (n - 1)
+    i1, i3 = int(k1), int(k3)
+    j1, j3 = min(i1 + 1, n - 1), min(i3 + 1, n - 1)
+    part = np.partition(arr, sorted({i1, j1, i3, j3}), axis=0)
+    q1 = part[i1] + (k1 - i1) * (part[j1] - part[i1])
+    q3 = part[i3] + (k3 - i3) * (part[j3] - part[i3])
+    return q1, q3
+
+
+def _fingerprint(arr):
+    """Content digest of an array (shape, dtype and bytes) for cache validation."""
+    arr = np.ascontiguousarray(arr)
+    return arr.shape, arr.dtype.str, hashlib.blake2b(arr.data, digest_size=16).digest()
+
+
+# Matrices with at least this many cells use the numba IQR kernel; below it the
+# kernel's load/compile cost on first use outweighs its gain over the NumPy broadcast
+IQR_KERNEL_MIN_CELLS = 10_000_000
+
+
+if NUMBA_AVAILABLE:
+    # No fastmath: it assumes NaN-free input, and NaN must never compare as out of bounds
+    @njit(parallel=True, cache=True)
+    def _iqr_mask_kernel(arr, lower, upper):
+        n, m = arr.shape
+        out = np.zeros(n, dtype=np.bool_)
+        for i in prange(n):
+            for j in range(m):
+                v = arr[i, j]
+                if v < lower[j] or v > upper[j]:
+                    out[i] = True
+                    break
+        return out
+
 
 class AnomalyDetector:
     """
@@ -35,27 +99,89 @@ class AnomalyDetector:
         self.ensemble_detector = None
         self.neural_symbolic_detector = None
 
+        # Reuse the fitted ML model when the same, unchanged DataFrame is seen again.
+        # The key holds a weakref so a recycled id() never matches a different frame,
+        # and a content fingerprint so in-place edits are not served a stale fit.
+        self._ml_fit_key = None
+
+    def __getstate__(self):
+        # The fit-reuse key holds a weakref, which cannot be pickled; a restored
+        # detector simply refits on its first train_ml call
+        state = self.__dict__.copy()
+        state['_ml_fit_key'] = None
+        return state
+
     def detect_iqr(self, series):
         if series.empty:
             return pd.Series(dtype=bool)
-        q1 = series.quantile(0.25)
-        q3 = series.quantile(0.75)
+        arr = series.to_numpy(dtype=np.float64).reshape(-1, 1)
+        return pd.Series(self._iqr_mask(arr), index=series.index)
+
+    def _iqr_bounds(self, arr):
+        """Per-column lower/upper IQR bounds for a 2-D float array (NaNs ignored)."""
+        q1, q3 = _quartiles(arr)
         iqr = q3 - q1
-        lower_bound = q1 - (iqr * self.factor)
-        upper_bound = q3 + (iqr * self.factor)
-        return (series < lower_bound) | (series > upper_bound)
+        return q1 - (iqr * self.factor), q3 + (iqr * self.factor)
+
+    def _iqr_mask(self, arr):
+        """Row mask: True where any column falls outside its IQR bounds."""
+        if arr.size == 0:
+            return np.zeros(arr.shape[0], dtype=bool)
+        lower, upper = self._iqr_bounds(arr)
+        if NUMBA_AVAILABLE and arr.size >= IQR_KERNEL_MIN_CELLS:
+            return _iqr_mask_kernel(arr, lower, upper)
+        return ((arr < lower) | (arr > upper)).any(axis=1)
+
+    @staticmethod
+    def _ml_matrix(df, columns):
+        """Contiguous float32 feature matrix handed to MLAnomaly (`df` may be an ndarray)."""
+        if isinstance(df, np.ndarray):
+            return np.ascontiguousarray(df, dtype=np.float32)
+        return np.ascontiguousarray(df[columns].to_numpy(dtype=np.float32))
+
+    def _df_key(self, df, columns, method):
+        return (id(df), tuple(columns) if columns is not None else None, method)
+
+    def fit(self, df, columns=None):
+        """Train the configured ML/AI detector once so later `detect` calls only score.
+
+        Example: `AnomalyDetector(method='isolation_forest').fit(train_df).detect(batch_df)`
+        """
+        if self.method in ('isolation_forest', 'clustering', 'autoencoder'):
+            self.train_ml(df, columns=columns, method=self.method)
+        elif self.method in ('fuzzy', 'expert', 'timeseries', 'genetic', 'ensemble', 'neural_symbolic'):
+            self.train_ai(df, columns=columns, ai_method=self.method)
+        return self
 
     def train_ml(self, df, columns=None, method='isolation_forest'):
         """Train an ML-based detector on provided DataFrame and columns.
 
         Example: `train_ml(df, columns=['x','y'], method='autoencoder')`
         """
-        if columns is None:
+        self._train_ml(df, columns, method)
+
+    def _train_ml(self, df, columns, method, predict=False):
+        """Fit the ML detector on a DataFrame or feature ndarray; with `predict=True`
+        also return the mask for it."""
+        if columns is None and not isinstance(df, np.ndarray):
             columns = df.select_dtypes(include=['number']).columns.tolist()
-        X = df[columns]
+        key = self._df_key(df, columns, method)
+        X = self._ml_matrix(df, columns)
+        fingerprint = _fingerprint(X)
+        if (self.ml_detector is not None and self._ml_fit_key is not None
+                and self._ml_fit_key[0] == key and self._ml_fit_key[1]() is df
+                and self._ml_fit_key[2] == fingerprint):
+            self.method = method
+            return self.ml_detector.predict(X) if predict else None
         self.ml_detector = MLAnomaly(method=method, **self.ml_params)
-        self.ml_detector.fit(X)
+        if predict:
+            mask_arr = self.ml_detector.fit_predict(X)
+        else:
+            self.ml_detector.fit(X)
+            mask_arr = None
         self.method = method
+        self._ml_fit_key = (key, weakref.ref(df), fingerprint)
+        return mask_arr
 
     def train_ai(self, df, columns=None, ai_method='fuzzy'):
         """Train advanced AI-based detector.
@@ -101,16 +227,23 @@ class AnomalyDetector:
         """Detect anomalies using IQR (default), ML, or advanced AI methods.
 
         Returns a boolean Series indexed as `df` where True indicates anomaly.
+
+        `df` may also be an `(X, index)` tuple: a precomputed 2-D feature ndarray and
+        the row index it belongs to, so several detectors can share one matrix
+        instead of each re-slicing the DataFrame. `columns` then only names X's columns.
         """
+        if isinstance(df, tuple):
+            return self._detect_matrix(*df, columns=columns)
         if columns is None:
             columns = df.select_dtypes(include=['number']).columns.tolist()
 
         # If ML method specified and detector available, use it
         if self.method in ('isolation_forest', 'clustering', 'autoencoder'):
             if self.ml_detector is None:
-                self.train_ml(df, columns=columns, method=self.method)
-            X = df[columns]
-            mask_arr = self.ml_detector.predict(X)
+                # Fit and score the same frame in one pass
+                mask_arr = self._train_ml(df, columns, self.method, predict=True)
+            else:
+                mask_arr = self.ml_detector.predict(self._ml_matrix(df, columns))
             return pd.Series(mask_arr, index=df.index)
         
         # If AI method specified, use it
@@ -131,12 +264,62 @@ class AnomalyDetector:
             mask = scores > threshold
             return pd.Series(mask, index=df.index)
 
-        # Fallback to IQR
-        mask = pd.Series(False, index=df.index)
-        for col in columns:
-            if col in df.columns:
-                mask |= self.detect_iqr(df[col])
-        return mask
+        # Fallback to IQR: one quantile pass over all columns at once
+        columns = [col for col in columns if col in df.columns]
+        arr = df[columns].to_numpy(dtype=np.float64, copy=False)
+        if arr.size == 0:
+            return pd.Series(False, index=df.index)
+        return pd.Series(self._iqr_mask(arr), index=df.index)
+
+    def _detect_matrix(self, X, index, columns=None):
+        """`detect` on a precomputed feature matrix (rows aligned with `index`)."""
+        X = np.asarray(X)
+        if X.ndim == 1:
+            X = X.reshape(-1, 1)
+
+        if self.method in ('isolation_forest', 'clustering', 'autoencoder'):
+            if self.ml_detector is None:
+                mask_arr = self._train_ml(X, None, self.method, predict=True)
+            else:
+                mask_arr = self.ml_detector.predict(self._ml_matrix(X, None))
+            return pd.Series(mask_arr, index=index)
+
+        if self.method in ('fuzzy', 'expert', 'timeseries', 'genetic', 'ensemble', 'neural_symbolic'):
+            frame = pd.DataFrame(X, index=index, columns=columns)
+            return self.detect(frame, columns=list(frame.columns))
+
+        arr = X.astype(np.float64, copy=False)
+        if arr.size == 0:
+            return pd.Series(False, index=index)
+        return pd.Series(self._iqr_mask(arr), index=index)
+
+    def detect_cascade(self, df, columns=None):
+        """Two-tier detection: IQR first, then the ML detector on the rows IQR did not flag.
+
+        Returns the same mask as OR-ing the IQR and ML results, but skips ML scoring
+        for rows that are already anomalous. Requires an ML `method`; the detector is
+        trained on the full frame if it has not been fitted yet.
+
+        Example: `AnomalyDetector(method='isolation_forest').detect_cascade(df, ['x','y'])`
+        """
+        if self.method not in ('isolation_forest', 'clustering', 'autoencoder'):
+            raise ValueError(f'detect_cascade requires an ML method, got: {self.method}')
+        if columns is None:
+            columns = df.select_dtypes(include=['number']).columns.tolist()
+        columns = [col for col in columns if col in df.columns]
+
+        arr = df[columns].to_numpy(dtype=np.float64, copy=False)
+        if arr.size == 0:
+            return pd.Series(False, index=df.index)
+        mask = self._iqr_mask(arr)
+
+        if self.ml_detector is None:
+            self.train_ml(df, columns=columns, method=self.method)
+        remaining = ~mask
+        if remaining.any():
+            X = np.ascontiguousarray(arr[remaining], dtype=np.float32)
+            mask[remaining] = self.ml_detector.predict(X)
+        return pd.Series(mask, index=df.index)
 
     def detect_with_scores(self, df, columns=None):
         """Return anomaly scores instead of binary predictions.
@@ -1,108 +1,352 @@
+import os
+import tempfile
+import warnings
+import weakref
 import numpy as np
+from joblib import parallel_backend
 from sklearn.ensemble import IsolationForest
-from sklearn.cluster import KMeans
+from sklearn.cluster import KMeans, MiniBatchKMeans
 from sklearn.preprocessing import StandardScaler
 
 try:
+    import tensorflow as tf
     from tensorflow import keras
     from tensorflow.keras import layers
     TF_AVAILABLE = True
 except Exception:
     TF_AVAILABLE = False
 
+try:
+    import treelite
+    import treelite.sklearn
+    import tl2cgen
+    TREELITE_AVAILABLE = True
+except Exception:
+    TREELITE_AVAILABLE = False
+
+
+def _partition_percentile(a, q):
+    """np.percentile(a, q) (linear interpolation) using O(n) np.partition."""
+    k = q / 100.0 * (a.size - 1)
+    lo = int(k)
+    hi = min(lo + 1, a.size - 1)
+    part = np.partition(a, [lo, hi])
+    return part[lo] + (k - lo) * (part[hi] - part[lo])
+
+
+def _exceeds(values, threshold):
+    """C-contiguous bool mask `values > threshold`, compared in the dtype of `values`.
+
+    An infinite threshold short-circuits to an all-False mask without a pass over `values`.
+    """
+    threshold = values.dtype.type(threshold)
+    if np.isposinf(threshold):
+        return np.zeros(values.shape, dtype=bool)
+    return np.greater(values, threshold)
+
+
+def _tree_input(X):
+    """C-contiguous float32 view/copy of X: sklearn trees split in float32, so input
+    already in that layout passes validation without another conversion."""
+    return np.ascontiguousarray(X, dtype=np.float32)
+
+
+# Keras dtype policy of the autoencoder's hidden layer
+AE_HIDDEN_DTYPE_POLICY = 'mixed_bfloat16'
+
+# Rows scored per step by predict
+PREDICT_CHUNK_ROWS = 65_536
+
+# Above this many training rows clustering always uses MiniBatchKMeans
+MINIBATCH_MIN_ROWS = 10_000
+
 
 class MLAnomaly:
     """Simple wrapper exposing `fit` and `predict` for ML anomaly detectors.
 
     Implements Isolation Forest (sklearn), Clustering, and Autoencoder (Keras).
+
+    The Isolation Forest uses ``n_jobs=-1`` for ``fit``; sklearn ignores that
+    setting for scoring, so ``predict`` runs under a threading
+    ``joblib.parallel_backend`` context to spread per-tree scoring across cores.
+    Trees are grown on ``min(256, n)``-row subsamples with 100 estimators; more
+    estimators are only worth it for very noisy data, where isolation depths
+    need more averaging.
+
+    ``compile_forest=True`` compiles the fitted forest to a native library with
+    treelite/tl2cgen (a C toolchain is required) and scores through it; the
+    one-off compile takes seconds, so it pays off for repeated large predicts.
+    Without treelite the sklearn forest is used.
+
+    For the autoencoder, ``quantize='int8'`` or ``quantize='float16'`` converts
+    the trained model with post-training TFLite quantization and scores through
+    the TFLite interpreter (threshold calibration included).
     """
 
-    def __init__(self, method='isolation_forest', random_state=42, contamination=0.05):
+    def __init__(self, method='isolation_forest', random_state=42, contamination=0.05, quantize=None,
+                 use_minibatch=True, compile_forest=False):
+        if quantize not in (None, 'int8', 'float16'):
+            raise ValueError('Unknown quantize mode: %s' % quantize)
         self.method = method
         self.random_state = random_state
         self.contamination = contamination  # Expected fraction of anomalies
+        self.quantize = quantize
+        self.use_minibatch = use_minibatch  # clustering: MiniBatchKMeans (always used above 10k rows)
+        self.compile_forest = compile_forest
+        self._tl_predictor = None
+        self._tl_dir = None
         self.scaler = StandardScaler()
         self.model = None
+        self._tflite = None
+        self._interpreter = None
+        self._ae_weights = None  # (W1, b1, W2, b2) float32, for the NumPy forward pass
         self.ae_threshold = None
         self.kmeans = None
+        self._centers = None
+        self._c_norms = None
         self.distance_threshold = None
+        self._fill_values = None  # training column means used to impute NaNs
+        self._mu = None  # scaler mean_ / 1 / scale_, cached for inline standardization
+        self._inv_scale = None
+        self._scaled_cache = (None, None)  # (weakref to last reuse_prepared input, its prepared array)
+
+    def __getstate__(self):
+        # The reuse_prepared cache holds a weakref, which cannot be pickled
+        state = self.__dict__.copy()
+        state['_scaled_cache'] = (None, None)
+        return state
 
     def fit(self, X):
-        X = self._prepare_X(X)
+        self._fit(self._prepare_X(X, fit=True))
+        return self
+
+    def fit_predict(self, X):
+        """Fit on X and return its anomaly mask, preparing/scaling X only once."""
+        X = self._prepare_X(X, fit=True)
+        self._fit(X)
+        return self._predict(X)
+
+    def _fit(self, X):
         if self.method == 'isolation_forest':
-            self.model = IsolationForest(contamination=self.contamination, random_state=self.random_state)
-            self.model.fit(X)
+            # Explicit max_features=1.0 / bootstrap=False keeps sklearn's bagging
+            # on the fast path that skips per-tree feature/sample indexing.
+            # Explicit subsample cap (what 'auto' resolves to); see class docstring
+            self.model = IsolationForest(n_estimators=100, max_samples=min(256, X.shape[0]),
+                                         contamination=self.contamination, random_state=self.random_state,
+                                         max_features=1.0, bootstrap=False, n_jobs=-1)
+            self.model.fit(_tree_input(X))
+            self._tl_predictor = self._compile_forest() if self.compile_forest and TREELITE_AVAILABLE else None
         elif self.method == 'clustering':
             # Use K-means with k=5 clusters; anomalies are far from cluster centers
             n_clusters = max(3, min(10, X.shape[0] // 1000))
-            self.kmeans = KMeans(n_clusters=n_clusters, random_state=self.random_state, n_init=10)
+            if self.use_minibatch or X.shape[0] > MINIBATCH_MIN_ROWS:
+                # Mini-batch updates: centers converge from 4096-row samples, not full passes.
+                # No center reassignment: the small outlier clusters are what we want to keep.
+                self.kmeans = MiniBatchKMeans(n_clusters=n_clusters, random_state=self.random_state,
+                                              batch_size=4096, n_init=3, max_iter=100, reassignment_ratio=0.0)
+            else:
+                self.kmeans = KMeans(n_clusters=n_clusters, random_state=self.random_state, n_init=10)
             self.kmeans.fit(X)
+            self._centers = np.ascontiguousarray(self.kmeans.cluster_centers_, dtype=np.float32)
+            self._c_norms = np.einsum('ij,ij->i', self._centers, self._centers)
             # Distance from cluster center
-            distances = np.min(self.kmeans.transform(X), axis=1)
+            distances = self._min_center_distance(X)
             # Threshold: mean + 3*std of distances
-            self.distance_threshold = np.mean(distances) + 3 * np.std(distances)
+            self.distance_threshold = np.float32(np.mean(distances) + 3 * np.std(distances))
         elif self.method == 'autoencoder':
             if not TF_AVAILABLE:
                 raise RuntimeError('TensorFlow is required for autoencoder method')
             n_features = X.shape[1]
             # Shallow autoencoder to avoid overfitting
             input_layer = keras.Input(shape=(n_features,))
-            encoded = layers.Dense(max(3, n_features // 2), activation='relu')(input_layer)
-            decoded = layers.Dense(n_features, activation='linear')(encoded)
-            ae = keras.Model(inputs=input_layer, outputs=decoded)
+            # Hidden layer computes in bfloat16 (float32 weights); the output layer stays
+            # float32 so reconstruction errors are not rounded. Set per layer, not via
+            # the global mixed-precision policy, to leave other Keras models untouched.
+            # TFLite has no bfloat16 kernels, so quantized models keep float32 throughout.
+            hidden_dtype = 'float32' if self.quantize is not None else AE_HIDDEN_DTYPE_POLICY
+            encoder = layers.Dense(max(3, n_features // 2), activation='relu', dtype=hidden_dtype)
+            decoder = layers.Dense(n_features, activation='linear', dtype='float32')
+            ae = keras.Model(inputs=input_layer, outputs=decoder(encoder(input_layer)))
             ae.compile(optimizer='adam', loss='mse')
-            ae.fit(X, X, epochs=10, batch_size=32, verbose=0)
+            ae.fit(X, X, epochs=10, batch_size=256, verbose=0)
             self.model = ae
+            # Dense -> ReLU -> Dense needs no TensorFlow at inference: keep the weights
+            # and run the forward pass as two NumPy sgemm calls
+            self._ae_weights = tuple(np.ascontiguousarray(w, dtype=np.float32)
+                                     for w in encoder.get_weights() + decoder.get_weights())
+            if self.quantize is not None:
+                self._tflite = self._quantize_model(ae, X)
+                self._interpreter = tf.lite.Interpreter(model_content=self._tflite)
             # Calculate reconstruction errors
-            train_recon = ae.predict(X, verbose=0)
-            train_mse = np.mean(np.square(X - train_recon), axis=1)
+            train_mse = self._reconstruction_error(X)
             # Handle case where MSE is very small; use percentile threshold
             mse_nonzero = train_mse[train_mse > 0]
             if len(mse_nonzero) > 0:
                 # Use 95th percentile if there's variation, else use max value
-                self.ae_threshold = np.percentile(mse_nonzero, 95) if len(mse_nonzero) > 20 else np.max(train_mse) * 0.5
+                self.ae_threshold = _partition_percentile(mse_nonzero, 95) if len(mse_nonzero) > 20 else np.max(train_mse) * 0.5
             else:
                 # No variation; set high threshold to detect nothing (safe default)
                 self.ae_threshold = np.max(train_mse) + 1
+            self.ae_threshold = np.float32(self.ae_threshold)
         else:
             raise ValueError('Unknown method: %s' % self.method)
 
-    def predict(self, X):
-        """Return boolean mask: True = anomaly"""
-        X = self._prepare_X(X)
+    def predict(self, X, batch_size=None, reuse_prepared=False):
+        """Return boolean mask (C-contiguous NumPy bool array): True = anomaly
+
+        With `batch_size`, rows are standardized and scored `batch_size` at a time,
+        bounding the size of the scaled temporaries for very large inputs.
+
+        With `reuse_prepared=True`, the imputed/standardized copy of X is kept and
+        reused while the same, unmodified X object is predicted again (e.g. threshold
+        sweeps). Do not opt in when X is a buffer that is refilled in place.
+        """
+        if batch_size is None or len(X) <= batch_size:
+            return self._predict(self._prepare_X(X, reuse=reuse_prepared))
+        if hasattr(X, 'values'):
+            X = X.values
+        out = np.empty(len(X), dtype=bool)
+        for start in range(0, len(X), batch_size):
+            stop = start + batch_size
+            out[start:stop] = self._predict(self._prepare_X(X[start:stop]))
+        return out
+
+    def _predict(self, X):
+        """Anomaly mask for prepared X, scored PREDICT_CHUNK_ROWS rows at a time so the
+        N x K distance and N x D reconstruction temporaries stay tile-sized."""
+        if len(X) <= PREDICT_CHUNK_ROWS:
+            return self._predict_chunk(X)
+        out = np.empty(len(X), dtype=bool)
+        for start in range(0, len(X), PREDICT_CHUNK_ROWS):
+            stop = start + PREDICT_CHUNK_ROWS
+            out[start:stop] = self._predict_chunk(X[start:stop])
+        return out
+
+    def _predict_chunk(self, X):
         if self.method == 'isolation_forest':
+            if self._tl_predictor is not None:
+                # Compiled forest outputs -score_samples; sklearn flags score_samples < offset_
+                scores = self._tl_predictor.predict(tl2cgen.DMatrix(_tree_input(X)))
+                return scores.reshape(len(X)) > -self.model.offset_
             # sklearn returns -1 for outliers
-            preds = self.model.predict(X)
+            with parallel_backend('threading', n_jobs=-1):
+                preds = self.model.predict(_tree_input(X))
             return preds == -1
         elif self.method == 'clustering':
             # Distance from nearest cluster center
-            distances = np.min(self.kmeans.transform(X), axis=1)
-            return distances > self.distance_threshold
+            return _exceeds(self._min_center_distance(X), self.distance_threshold)
         elif self.method == 'autoencoder':
-            recon = self.model.predict(X, verbose=0)
-            mse = np.mean(np.square(X - recon), axis=1)
             # Use percentile threshold
-            return mse > self.ae_threshold
+            return _exceeds(self._reconstruction_error(X), self.ae_threshold)
 
-    def _prepare_X(self, X):
-        # X can be DataFrame or ndarray
-        if hasattr(X, 'values'):
-            arr = X.values.astype(float)
+    def _compile_forest(self):
+        """Compile the fitted IsolationForest to a shared library; returns its tl2cgen Predictor."""
+        self._tl_dir = tempfile.TemporaryDirectory()  # removed with this object
+        libpath = os.path.join(self._tl_dir.name, 'isolation_forest.so')
+        tl2cgen.export_lib(treelite.sklearn.import_model(self.model), toolchain='gcc',
+                           libpath=libpath, params={'parallel_comp': 4})
+        return tl2cgen.Predictor(libpath)
+
+    def _min_center_distance(self, X):
+        """Distance from each row to its nearest cluster center.
+
+        Uses ||x||^2 + ||c||^2 - 2 x.c (one GEMM against the cached centers) and takes
+        the row minimum before the sqrt, instead of materializing all N x K distances.
+        """
+        x_norms = np.einsum('ij,ij->i', X, X)
+        d2 = X @ self._centers.T
+        d2 *= -2.0
+        d2 += self._c_norms
+        d2_min = d2.min(axis=1)
+        d2_min += x_norms
+        return np.sqrt(np.maximum(d2_min, 0))
+
+    def _reconstruction_error(self, X):
+        """Per-row mean squared reconstruction error.
+
+        The residual overwrites the reconstruction buffer and einsum fuses the
+        square + row sum (about 4x faster here than np.square + np.add.reduce), so
+        no extra N x D temporaries are allocated; the row sums are scaled in place.
+        """
+        recon = np.require(self._reconstruct(X), dtype=X.dtype, requirements='W')
+        diff = np.subtract(X, recon, out=recon)
+        mse = np.einsum('ij,ij->i', diff, diff)
+        mse *= 1.0 / X.shape[1]
+        return mse
+
+    def _reconstruct(self, X):
+        """Autoencoder reconstruction of X, via the TFLite interpreter when quantized."""
+        if self._interpreter is None:
+            W1, b1, W2, b2 = self._ae_weights
+            H = X @ W1
+            H += b1
+            np.maximum(H, 0, out=H)
+            R = H @ W2
+            R += b2
+            return R
+        interpreter = self._interpreter
+        input_index = interpreter.get_input_details()[0]['index']
+        interpreter.resize_tensor_input(input_index, X.shape)
+        interpreter.allocate_tensors()
+        interpreter.set_tensor(input_index, np.ascontiguousarray(X, dtype=np.float32))
+        interpreter.invoke()
+        return interpreter.get_tensor(interpreter.get_output_details()[0]['index'])
+
+    def _quantize_model(self, model, X):
+        """Post-training quantize a Keras model; returns the TFLite flatbuffer."""
+        converter = tf.lite.TFLiteConverter.from_keras_model(model)
+        converter.optimizations = [tf.lite.Optimize.DEFAULT]
+        if self.quantize == 'int8':
+            # Calibrate activation ranges on (up to) 100 training rows
+            sample = np.asarray(X[:100], dtype=np.float32)
+            converter.representative_dataset = lambda: ([sample[i:i + 1]] for i in range(len(sample)))
+            converter.target_spec.supported_ops = [tf.lite.OpsSet.TFLITE_BUILTINS_INT8]
         else:
-            arr = np.asarray(X, dtype=float)
+            converter.target_spec.supported_types = [tf.float16]
+        return converter.convert()
+
+    def _prepare_X(self, X, fit=False, reuse=False):
+        """Impute and standardize X; `fit=True` learns the fill values and scaler.
+
+        Predict-time rows are transformed with the training statistics only, so
+        each row's result does not depend on the other rows in the batch. With
+        `reuse=True` the prepared array of the last such call is returned while the
+        same X object is passed again (the caller guarantees X was not modified).
+        """
+        if fit:
+            self._scaled_cache = (None, None)
+        elif reuse:
+            ref, cached = self._scaled_cache
+            if ref is not None and ref() is X:
+                return cached
+        source = X
+        # X can be DataFrame or ndarray; all models run on float32 features
+        if hasattr(X, 'values'):
+            X = X.values
+        # Private C-contiguous copy: NaN filling below happens in place
+        arr = np.array(X, dtype=np.float32, order='C')
         # handle single-column case
         if arr.ndim == 1:
             arr = arr.reshape(-1, 1)
-        # Fill NaN values with column mean
-        for col in range(arr.shape[1]):
-            col_data = arr[:, col]
-            mask = np.isnan(col_data)
-            if mask.any():
-                col_mean = np.nanmean(col_data)
-                arr[mask, col] = col_mean
-        # fit scaler only if model not trained yet
-        if self.model is None:
-            arr = self.scaler.fit_transform(arr)
-        else:
-            arr = self.scaler.transform(arr)
+        # Fill NaN values with the training column mean
+        if fit:
+            with warnings.catch_warnings():
+                warnings.simplefilter('ignore', RuntimeWarning)  # all-NaN column
+                col_means = np.nanmean(arr, axis=0)
+            self._fill_values = np.where(np.isnan(col_means), 0.0, col_means)
+        mask = np.isnan(arr)
+        if mask.any():
+            arr[mask] = np.take(self._fill_values, np.nonzero(mask)[1])
+        if fit:
+            self.scaler.fit(arr)
+            self._mu = np.ascontiguousarray(self.scaler.mean_, dtype=arr.dtype)
+            self._inv_scale = np.ascontiguousarray(1.0 / self.scaler.scale_, dtype=arr.dtype)
+        # Standardize in place on the private copy (skips sklearn's per-call validation)
+        np.subtract(arr, self._mu, out=arr)
+        np.multiply(arr, self._inv_scale, out=arr)
+        if reuse and not fit:
+            try:
+                self._scaled_cache = (weakref.ref(source), arr)
+            except TypeError:  # lists etc. cannot be weakly referenced
+                pass
         return arr
@@ -1,6 +1,107 @@
 # src/validation/rule_validator.py
+import numbers
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
 import pandas as pd
 
+try:
+    from numba import njit, prange
+    NUMBA_AVAILABLE = True
+except Exception:
+    NUMBA_AVAILABLE = False
+
+try:
+    import numexpr as ne
+    NUMEXPR_AVAILABLE = True
+except Exception:
+    NUMEXPR_AVAILABLE = False
+
+# Bits of the packed per-row flags produced by the fused row checks
+NULL_BIT = 1
+RANGE_BIT = 2
+CATEGORY_BIT = 4
+
+# Columns of the frame returned by RuleValidator.validate
+VALIDATION_COLUMNS = ['null_or_missing', 'duplicate_id', 'range_violation', 'invalid_category', 'anomaly']
+
+if NUMBA_AVAILABLE:
+    @njit(parallel=True, cache=True, nogil=True)
+    def _row_flags_kernel(num, num_required, lower, upper,
+                          codes, code_required, code_checked, valid, valid_offset):
+        """One pass over every row: numeric block (null + range) and factorized block (null + category)."""
+        n = num.shape[0]
+        out = np.zeros(n, dtype=np.uint8)
+        for i in prange(n):
+            flags = 0
+            for j in range(num.shape[1]):
+                v = num[i, j]
+                if v != v:
+                    if num_required[j]:
+                        flags |= NULL_BIT
+                elif v < lower[j] or v > upper[j]:
+                    flags |= RANGE_BIT
+            for j in range(codes.shape[1]):
+                c = codes[i, j]
+                if c < 0:
+                    if code_required[j]:
+                        flags |= NULL_BIT
+                    if code_checked[j]:
+                        flags |= CATEGORY_BIT
+                elif code_checked[j] and not valid[valid_offset[j] + c]:
+                    flags |= CATEGORY_BIT
+            out[i] = flags
+        return out
+
+
+# Allowed-value lists up to this size are checked with unrolled != comparisons
+UNROLL_MAX_CATEGORIES = 8
+
+
+def _not_in_sorted(values, allowed):
+    """Mask of numeric `values` not present in the sorted numeric array `allowed`."""
+    if allowed.size <= UNROLL_MAX_CATEGORIES:
+        invalid = np.ones(values.shape, dtype=bool)
+        for a in allowed:
+            invalid &= values != a
+        return invalid
+    idx = np.searchsorted(allowed, values)
+    return (idx == allowed.size) | (allowed[np.minimum(idx, allowed.size - 1)] != values)
+
+
+# Frames with at least this many rows use the fused numba row checks. Below it the
+# kernel's load/compile cost on first use (~0.13 s from a warm numba cache, >1 s cold)
+# outweighs its ~2x steady-state gain over the NumPy checks
+FUSED_MIN_ROWS = 1_000_000
+
+# Frames with at least this many rows run the independent checks on a thread pool
+PARALLEL_MIN_ROWS = 100_000
+
+# Integer keys spanning at most this many slots per row are counted with bincount
+BINCOUNT_MAX_SPAN_RATIO = 4
+
+
+def _duplicated_dense_ints(values):
+    """keep=False duplicate mask for integer keys via one bincount over value offsets.
+
+    Returns None when `values` is not an integer array or its range is too sparse
+    for a count table (the caller then falls back to hashing).
+    """
+    if values.dtype.kind not in 'iu' or values.size == 0:
+        return None
+    lo, hi = int(values.min()), int(values.max())
+    if hi - lo > BINCOUNT_MAX_SPAN_RATIO * values.size:
+        return None
+    wide = np.int64 if values.dtype.kind == 'i' else np.uint64  # no small-int overflow
+    offsets = (values.astype(wide, copy=False) - wide(lo)).astype(np.intp, copy=False)
+    return np.bincount(offsets)[offsets] > 1
+
+
+def _mask_array(mask):
+    """Boolean ndarray from a check mask; NA (nullable dtypes) counts as no violation."""
+    return mask.to_numpy(dtype=bool, na_value=False)
+
+
 class RuleValidator:
     """
     Applies various validation rules:
@@ -20,44 +121,168 @@ class RuleValidator:
         self.required_columns = required_columns or []
         self.allowed_ranges = allowed_ranges or {}
         self.allowed_categories = allowed_categories or {}
+        # Per-rule lookups built once, not on every validate() call
+        self._allowed_cat_sets = {col: frozenset(vals) for col, vals in self.allowed_categories.items()}
+        # Real-number bounds become float64 pairs; others (timestamps, strings) stay as
+        # given and are compared column by column
+        self._allowed_range_arrs = {
+            col: (np.float64(lo), np.float64(hi))
+            if isinstance(lo, numbers.Real) and isinstance(hi, numbers.Real) else (lo, hi)
+            for col, (lo, hi) in self.allowed_ranges.items()}
+        self._numeric_ranges = frozenset(
+            col for col, (lo, hi) in self.allowed_ranges.items()
+            if isinstance(lo, numbers.Real) and isinstance(hi, numbers.Real))
+        self._cat_has_null = {col: bool(pd.isna(list(vals)).any())
+                              for col, vals in self.allowed_categories.items()}
+        # Pre-sorted arrays for purely numeric (NaN-free) allowed values; others use isin
+        self._allowed_sorted = {}
+        for col, valid_vals in self.allowed_categories.items():
+            arr = np.asarray(list(valid_vals))
+            if arr.size and arr.dtype.kind in 'iuf' and not np.isnan(arr.astype(float)).any():
+                self._allowed_sorted[col] = np.sort(arr)
 
     def check_nulls(self, df):
         """Return a mask for rows with nulls in any required column."""
-        mask = pd.Series(False, index=df.index)
-        for col in self.required_columns:
-            if col in df.columns:
-                mask |= df[col].isnull()
-        return mask
+        cols = [col for col in self.required_columns if col in df.columns]
+        if not cols:
+            return pd.Series(False, index=df.index)
+        # DataFrame.isna works block-wise, so mixed dtypes are never upcast to object
+        return pd.Series(df[cols].isna().to_numpy().any(axis=1), index=df.index)
 
     def check_duplicates(self, df, subset):
         """Return a mask for rows that are duplicates based on subset of columns."""
+        if len(subset) == 1:
+            col = df[subset[0]]
+            # Dense integer ids: count occurrences directly, no hashing at all
+            dup = _duplicated_dense_ints(col.to_numpy())
+            if dup is not None:
+                return pd.Series(dup, index=df.index)
+            # Other single key columns: hash the column directly, no row-tuple grouping
+            return col.duplicated(keep=False)
         return df.duplicated(subset=subset, keep=False)
 
     def check_ranges(self, df):
         """Return a mask for rows with values outside the allowed numeric ranges."""
-        mask = pd.Series(False, index=df.index)
+        mask = np.zeros(len(df), dtype=bool)
+        numeric = [col for col in self.allowed_ranges
+                   if col in df.columns and col in self._numeric_ranges and df[col].dtype.kind in 'iufb']
+        if numeric:
+            # One 2-D comparison over all numeric ranged columns; NaN never violates
+            sub = df[numeric].to_numpy(dtype=np.float64, na_value=np.nan)
+            mins = np.array([self._allowed_range_arrs[col][0] for col in numeric])
+            maxs = np.array([self._allowed_range_arrs[col][1] for col in numeric])
+            if NUMEXPR_AVAILABLE and len(df) >= PARALLEL_MIN_ROWS and ne.get_num_threads() > 1:
+                # Both comparisons and the OR in one multi-threaded pass, no temporaries;
+                # single-threaded numexpr is slower than plain NumPy, so it is skipped then
+                outside = ne.evaluate('(sub < mins) | (sub > maxs)',
+                                      local_dict={'sub': sub, 'mins': mins, 'maxs': maxs})
+            else:
+                outside = (sub < mins) | (sub > maxs)
+            mask |= outside.any(axis=1)
         for col, (min_val, max_val) in self.allowed_ranges.items():
-            if col in df.columns:
-                mask |= (df[col] < min_val) | (df[col] > max_val)
-        return mask
+            if col in df.columns and col not in numeric:
+                mask |= _mask_array((df[col] < min_val) | (df[col] > max_val))
+        return pd.Series(mask, index=df.index)
 
     def check_categories(self, df):
         """Return a mask for rows with invalid category values."""
-        mask = pd.Series(False, index=df.index)
-        for col, valid_vals in self.allowed_categories.items():
+        mask = np.zeros(len(df), dtype=bool)
+        hashed = {}
+        for col, valid_vals in self._allowed_cat_sets.items():
             if col in df.columns:
-                mask |= ~df[col].isin(valid_vals)
-        return mask
+                allowed = self._allowed_sorted.get(col)
+                values = df[col].to_numpy()
+                if allowed is not None and values.dtype.kind in 'iuf':
+                    mask |= _not_in_sorted(values, allowed)
+                else:
+                    hashed[col] = valid_vals
+        if hashed:
+            # Remaining columns: a single DataFrame.isin over the sub-frame
+            mask |= ~df[list(hashed)].isin(hashed).to_numpy().all(axis=1)
+        return pd.Series(mask, index=df.index)
+
+    def _fused_row_checks(self, df):
+        """Null, range and category flags for all rows in a single streaming pass.
+
+        Returns a uint8 array of NULL_BIT | RANGE_BIT | CATEGORY_BIT per row, or None
+        when numba is unavailable, the frame has fewer than FUSED_MIN_ROWS rows, or a
+        rule cannot be expressed by the kernel
+        (non-numeric ranged column or bounds, null among the allowed categories).
+        """
+        if not NUMBA_AVAILABLE or len(df) < FUSED_MIN_ROWS:
+            return None
+        required = [c for c in self.required_columns if c in df.columns]
+        ranged = {c: r for c, r in self._allowed_range_arrs.items() if c in df.columns}
+        categorized = {c: v for c, v in self._allowed_cat_sets.items() if c in df.columns}
+        if any(c not in self._numeric_ranges or df[c].dtype.kind not in 'iufb' for c in ranged):
+            return None
+        if any(self._cat_has_null[c] for c in categorized):
+            return None
+
+        # Numeric block: ranged columns plus required numeric columns without a category rule
+        num_cols = list(ranged) + [c for c in required if c not in ranged and c not in categorized
+                                   and df[c].dtype.kind in 'iufb']
+        # Factorized block: category columns plus any remaining required columns
+        code_cols = list(categorized) + [c for c in required if c not in num_cols and c not in categorized]
+
+        n = len(df)
+        num = np.empty((n, len(num_cols)), dtype=np.float64)
+        lower = np.full(len(num_cols), -np.inf)
+        upper = np.full(len(num_cols), np.inf)
+        for j, col in enumerate(num_cols):
+            num[:, j] = df[col].to_numpy(dtype=np.float64, na_value=np.nan)
+            if col in ranged:
+                lower[j], upper[j] = ranged[col]
+        num_required = np.array([c in required for c in num_cols], dtype=np.bool_)
+
+        codes = np.empty((n, len(code_cols)), dtype=np.int64)
+        valid = [np.zeros(0, dtype=np.bool_)]
+        valid_offset = np.zeros(len(code_cols), dtype=np.int64)
+        offset = 0
+        for j, col in enumerate(code_cols):
+            codes[:, j], uniques = pd.factorize(df[col])
+            if col in categorized:
+                # Membership is resolved once per distinct value, not per row
+                valid.append(np.asarray(pd.Index(uniques).isin(categorized[col]), dtype=np.bool_))
+                valid_offset[j] = offset
+                offset += len(uniques)
+        code_required = np.array([c in required and c not in num_cols for c in code_cols], dtype=np.bool_)
+        code_checked = np.array([c in categorized for c in code_cols], dtype=np.bool_)
+
+        return _row_flags_kernel(num, num_required, lower, upper, codes, code_required,
+                                 code_checked, np.concatenate(valid), valid_offset)
 
     def validate(self, df):
         """
         Perform all checks and return a DataFrame with boolean flags:
         columns: null_or_missing, duplicate_id, range_violation, invalid_category, and anomaly (any).
         """
-        results = pd.DataFrame(index=df.index)
-        results['null_or_missing'] = self.check_nulls(df)
-        results['duplicate_id'] = self.check_duplicates(df, subset=['id'])
-        results['range_violation'] = self.check_ranges(df)
-        results['invalid_category'] = self.check_categories(df)
-        results['anomaly'] = results.any(axis=1)  # True if any check failed
-        return results
+        # One preallocated block for all five flags; Fortran order keeps each column
+        # contiguous and matches pandas' (columns x rows) block layout, so no copy
+        out = np.zeros((len(df), len(VALIDATION_COLUMNS)), dtype=bool, order='F')
+        if len(df) >= PARALLEL_MIN_ROWS:
+            # The checks read disjoint state and their NumPy/pandas/numba kernels
+            # release the GIL, so they overlap on separate threads
+            with ThreadPoolExecutor(max_workers=4) as pool:
+                dup = pool.submit(self.check_duplicates, df, ['id'])
+                flags = self._fused_row_checks(df)
+                if flags is None:
+                    checks = [pool.submit(check, df) for check in
+                              (self.check_nulls, self.check_ranges, self.check_categories)]
+                    for col, future in zip((0, 2, 3), checks):
+                        out[:, col] = _mask_array(future.result())
+                out[:, 1] = _mask_array(dup.result())
+        else:
+            flags = self._fused_row_checks(df)
+            out[:, 1] = _mask_array(self.check_duplicates(df, subset=['id']))
+            if flags is None:
+                out[:, 0] = _mask_array(self.check_nulls(df))
+                out[:, 2] = _mask_array(self.check_ranges(df))
+                out[:, 3] = _mask_array(self.check_categories(df))
+        if flags is not None:
+            np.not_equal(flags & NULL_BIT, 0, out=out[:, 0])
+            np.not_equal(flags & RANGE_BIT, 0, out=out[:, 2])
+            np.not_equal(flags & CATEGORY_BIT, 0, out=out[:, 3])
+        # anomaly: True if any check failed
+        np.any(out[:, :4], axis=1, out=out[:, 4])
+        return pd.DataFrame(out, index=df.index, columns=VALIDATION_COLUMNS)
@@ -1,7 +1,13 @@
 # tests/test_anomaly.py
+import pickle
 import unittest
+from unittest import mock
+import numpy as np
 import pandas as pd
+from src.validation import anomaly_detector
 from src.validation.anomaly_detector import AnomalyDetector
+from src.validation import ml_anomaly
+from src.validation.ml_anomaly import MLAnomaly, TF_AVAILABLE, TREELITE_AVAILABLE
 
 class TestAnomalyDetector(unittest.TestCase):
     def setUp(self):
@@ -23,3 +29,146 @@ class TestAnomalyDetector(unittest.TestCase):
         df = pd.DataFrame(data)
         mask = self.detector.detect(df, columns=['score'])
         self.assertEqual(mask.sum(), 0)
+
+    def test_multi_column_matches_per_column(self):
+        # Vectorized multi-column IQR must agree with OR-ing single-column results
+        data = {'a': [1, 2, 3, 4, 5, 6, 7, 8, 9, 100],
+                'b': [10, 11, None, 12, 13, -200, 12, 11, 10, 12]}
+        df = pd.DataFrame(data)
+        mask = self.detector.detect(df, columns=['a', 'b', 'missing'])
+        expected = self.detector.detect_iqr(df['a']) | self.detector.detect_iqr(df['b'])
+        self.assertTrue((mask == expected).all())
+        self.assertEqual(mask.sum(), 2)
+
+    def test_repeated_calls_reuse_cached_fit(self):
+        df = pd.DataFrame({'value': [100]*10 + [1000]})
+        first = self.detector.detect(df, columns=['value'])
+        second = self.detector.detect(df, columns=['value'])
+        self.assertTrue((first == second).all())
+        self.assertEqual(second.sum(), 1)
+
+        ml = AnomalyDetector(method='isolation_forest')
+        ml.train_ml(df, columns=['value'], method='isolation_forest')
+        fitted = ml.ml_detector
+        ml.train_ml(df, columns=['value'], method='isolation_forest')
+        self.assertIs(ml.ml_detector, fitted)
+
+    def test_in_place_changes_invalidate_cached_fit(self):
+        df = pd.DataFrame({'a': [1., 2, 3, 4, 5, 6, 7, 8, 9, 10]})
+        self.assertEqual(self.detector.detect(df, columns=['a']).sum(), 0)
+        df['a'] = [100., 200, 300, 400, 500, 600, 700, 800, 900, 1]
+        expected = AnomalyDetector().detect(df, columns=['a'])
+        self.assertTrue((self.detector.detect(df, columns=['a']) == expected).all())
+
+        ml = AnomalyDetector(method='isolation_forest')
+        ml.train_ml(df, columns=['a'], method='isolation_forest')
+        fitted = ml.ml_detector
+        df.loc[0, 'a'] = -5000.0
+        ml.train_ml(df, columns=['a'], method='isolation_forest')
+        self.assertIsNot(ml.ml_detector, fitted)
+
+    def test_fitted_detector_pickles(self):
+        df = pd.DataFrame({'a': [1., 2, 3, 4, 5, 6, 7, 8, 9, 100]})
+        detector = AnomalyDetector(method='isolation_forest').fit(df, ['a'])
+        expected = detector.detect(df, ['a'])
+        restored = pickle.loads(pickle.dumps(detector))
+        self.assertTrue((restored.detect(df, ['a']) == expected).all())
+
+    def test_numba_iqr_matches_numpy_fallback(self):
+        if not anomaly_detector.NUMBA_AVAILABLE:
+            self.skipTest('numba not installed')
+        rng = np.random.RandomState(1)
+        df = pd.DataFrame(rng.normal(0, 1, (200, 4)), columns=['a', 'b', 'c', 'd'])
+        df.iloc[::7, 1] = np.nan
+        df.iloc[::11, 2] = np.nan
+        df.iloc[::25, 0] = 9.0
+        df.iloc[3, 3] = np.nan
+        with mock.patch.object(anomaly_detector, 'IQR_KERNEL_MIN_CELLS', 0):
+            compiled = AnomalyDetector().detect(df)
+        with mock.patch.object(anomaly_detector, 'NUMBA_AVAILABLE', False):
+            reference = AnomalyDetector().detect(df)
+        self.assertTrue(compiled.equals(reference))
+        self.assertTrue(compiled.iloc[::25].all())
+
+    def test_cascade_matches_combined_masks(self):
+        rng = np.random.RandomState(0)
+        df = pd.DataFrame({'x': rng.normal(0, 1, 300), 'y': rng.normal(5, 2, 300)})
+        df.loc[::50, 'x'] = 25.0
+        detector = AnomalyDetector(method='clustering').fit(df, columns=['x', 'y'])
+        cascade = detector.detect_cascade(df, columns=['x', 'y'])
+        combined = AnomalyDetector().detect(df, columns=['x', 'y']) | detector.detect(df, columns=['x', 'y'])
+        self.assertTrue((cascade == combined).all())
+        self.assertTrue(cascade.iloc[::50].all())
+
+    def test_detect_accepts_precomputed_matrix(self):
+        df = pd.DataFrame({'a': [1, 2, 3, 4, 5, 6, 7, 8, 9, 100],
+                           'b': [10, 11, 12, 12, 13, -200, 12, 11, 10, 12]},
+                          index=range(100, 110))
+        X = df[['a', 'b']].to_numpy(dtype=np.float64)
+        from_matrix = self.detector.detect((X, df.index))
+        from_frame = self.detector.detect(df, columns=['a', 'b'])
+        self.assertTrue(from_matrix.index.equals(df.index))
+        self.assertTrue((from_matrix == from_frame).all())
+
+
+class TestMLAnomaly(unittest.TestCase):
+    METHODS = ['isolation_forest', 'clustering'] + (['autoencoder'] if TF_AVAILABLE else [])
+
+    def setUp(self):
+        rng = np.random.RandomState(0)
+        self.X = rng.normal(0, 1, (600, 3))
+        self.X[::40] += 8.0
+
+    def test_predict_sees_in_place_changes(self):
+        model = MLAnomaly(method='clustering').fit(self.X)
+        buf = self.X.copy()
+        before = model.predict(buf)
+        buf[:100] += 50.0
+        after = model.predict(buf)
+        self.assertTrue((after == model.predict(buf.copy())).all())
+        self.assertGreater(after.sum(), before.sum())
+        # Opt-in reuse returns the same mask for an unchanged input
+        self.assertTrue((model.predict(buf, reuse_prepared=True) == after).all())
+        self.assertTrue((model.predict(buf, reuse_prepared=True) == after).all())
+
+    def test_pickles_after_reuse_prepared(self):
+        model = MLAnomaly(method='clustering').fit(self.X)
+        expected = model.predict(self.X, reuse_prepared=True)
+        restored = pickle.loads(pickle.dumps(model))
+        self.assertTrue((restored.predict(self.X) == expected).all())
+
+    def test_unknown_quantize_mode_rejected(self):
+        with self.assertRaises(ValueError):
+            MLAnomaly(method='autoencoder', quantize='int4')
+
+    @unittest.skipUnless(TF_AVAILABLE, 'TensorFlow not installed')
+    def test_quantized_autoencoder_returns_mask(self):
+        for mode in ('float16', 'int8'):
+            model = MLAnomaly(method='autoencoder', quantize=mode).fit(self.X)
+            mask = model.predict(self.X)
+            self.assertEqual(mask.dtype, bool)
+            self.assertEqual(mask.shape, (len(self.X),))
+            self.assertGreater(mask.sum(), 0)
+
+    def test_batched_predict_matches_single_pass(self):
+        frame = pd.DataFrame(self.X, columns=['a', 'b', 'c'])
+        for method in self.METHODS:
+            model = MLAnomaly(method=method).fit(self.X)
+            expected = model.predict(self.X)
+            for X in (self.X, self.X.tolist(), frame):
+                self.assertTrue((model.predict(X, batch_size=64) == expected).all(), method)
+
+    def test_chunked_scoring_matches_single_pass(self):
+        for method in self.METHODS:
+            model = MLAnomaly(method=method).fit(self.X)
+            expected = model.predict(self.X)
+            with mock.patch.object(ml_anomaly, 'PREDICT_CHUNK_ROWS', 50):
+                chunked = model.predict(self.X)
+            self.assertTrue((chunked == expected).all(), method)
+
+    @unittest.skipUnless(TREELITE_AVAILABLE, 'treelite/tl2cgen not installed')
+    def test_compiled_forest_matches_sklearn(self):
+        compiled = MLAnomaly(method='isolation_forest', compile_forest=True).fit(self.X)
+        self.assertIsNotNone(compiled._tl_predictor)
+        reference = MLAnomaly(method='isolation_forest').fit(self.X)
+        self.assertTrue((compiled.predict(self.X) == reference.predict(self.X)).all())
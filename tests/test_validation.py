@@ -1,6 +1,8 @@
 # tests/test_validation.py
 import unittest
+from unittest import mock
 import pandas as pd
+from src.validation import rule_validator
 from src.validation.rule_validator import RuleValidator
 
 class TestRuleValidator(unittest.TestCase):
@@ -26,3 +28,53 @@ class TestRuleValidator(unittest.TestCase):
         self.assertTrue(results.loc[0, 'anomaly'])  # overall anomaly
         self.assertTrue(results.loc[1, 'anomaly'])
         self.assertFalse(results.loc[2, 'anomaly'])  # no anomaly for id=3
+
+    def test_fused_checks_match_per_check_path(self):
+        if not rule_validator.NUMBA_AVAILABLE:
+            self.skipTest('numba not installed')
+        df = pd.DataFrame({
+            'id': [1, 2, 2, 4, 5, 6],
+            'transaction_amount': [10, -1, None, 20000, 5, 7],
+            'account_balance': [100, 200, 300, None, 80000, 10],
+            'account_type': ['Retail', None, 'Corporate', 'Unknown', 'Investment', 'Retail'],
+        })
+        with mock.patch.object(rule_validator, 'FUSED_MIN_ROWS', 0):
+            self.assertIsNotNone(self.validator._fused_row_checks(df))
+            fused = self.validator.validate(df)
+        with mock.patch.object(rule_validator, 'NUMBA_AVAILABLE', False):
+            reference = self.validator.validate(df)
+        self.assertTrue(fused.equals(reference))
+        self.assertEqual(fused['anomaly'].tolist(), [False, True, True, True, True, False])
+
+    def test_non_numeric_range_bounds(self):
+        validator = RuleValidator(allowed_ranges={
+            'opened': (pd.Timestamp('2022-01-01'), pd.Timestamp('2022-12-31')),
+            'code': ('a', 'm'),
+            'transaction_amount': (0, 15000),
+        })
+        df = pd.DataFrame({
+            'id': [1, 2, 3, 4],
+            'opened': pd.to_datetime(['2021-06-01', '2022-03-01', '2023-01-05', None]),
+            'code': ['b', 'z', 'c', 'q'],
+            'transaction_amount': [10, 20, -5, 30],
+        })
+        results = validator.validate(df)
+        self.assertEqual(results['range_violation'].tolist(), [True, True, True, True])
+        self.assertEqual(validator.check_ranges(df[['opened']]).tolist(), [True, False, True, False])
+        self.assertEqual(validator.check_ranges(df[['code']]).tolist(), [False, True, False, True])
+
+    @unittest.skipUnless(rule_validator.NUMEXPR_AVAILABLE, 'numexpr not installed')
+    def test_numexpr_range_check_matches_numpy(self):
+        df = pd.DataFrame({
+            'transaction_amount': [10, -1, None, 20000, 5, 15000],
+            'account_balance': [100, 200, 300, None, 80000, -0.5],
+        })
+        with mock.patch.object(rule_validator, 'PARALLEL_MIN_ROWS', 0), \
+                mock.patch.object(rule_validator.ne, 'get_num_threads', return_value=2), \
+                mock.patch.object(rule_validator.ne, 'evaluate', wraps=rule_validator.ne.evaluate) as evaluate:
+            fused = self.validator.check_ranges(df)
+        evaluate.assert_called_once()
+        with mock.patch.object(rule_validator, 'NUMEXPR_AVAILABLE', False):
+            reference = self.validator.check_ranges(df)
+        self.assertTrue(fused.equals(reference))
+        self.assertEqual(fused.tolist(), [False, True, False, True, True, True])